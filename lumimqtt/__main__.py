@@ -4,48 +4,30 @@ Run with: python3 -m lumimqtt
 """
 
 import asyncio as aio
-import json
 import logging
-import os
 import sys
 from pathlib import Path
 
+from .config import MatterConfig, load_config
 from .matter_bridge import LumiMatter
-from .platform import devices
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+from .platform import buttons, lights
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-def load_config():
-    """Load configuration from JSON file"""
-    config_path = os.environ.get(
-        'LUMIMQTT_CONFIG',
-        '/etc/lumimqtt.json'
-    )
-    
-    if not os.path.exists(config_path):
-        logger.warning(f"Config file not found: {config_path}")
-        logger.info("Using default configuration")
-        return {
-            'device_id': 'lumi_gateway',
-            'device_name': 'Lumi Gateway',
-            'binary_sensors': {},
-            'custom_commands': {},
-        }
-    
-    with open(config_path, 'r') as f:
-        return json.load(f)
+logger = logging.getLogger(__name__)
 
 
 async def main():
     """Main entry point"""
     logger.info("Starting Lumi Matter Bridge")
-    
+
+    # Run new tasks inline until their first suspension (Python 3.12+)
+    if hasattr(aio, 'eager_task_factory'):
+        aio.get_running_loop().set_task_factory(aio.eager_task_factory)
+
     # Load configuration
     config = load_config()
     
@@ -54,28 +36,24 @@ async def main():
     device_name = config.get('device_name', 'Lumi Gateway')
     
     # Matter configuration
-    matter_config = config.get('matter', {})
-    vendor_id = matter_config.get('vendor_id', 0xFFF1)
-    product_id = matter_config.get('product_id', 0x8001)
-    discriminator = matter_config.get('discriminator', 3840)
-    passcode = matter_config.get('passcode', 20202021)
+    matter_config = MatterConfig.from_dict(config.get('matter', {}))
     
     # Create Matter bridge
     bridge = LumiMatter(
         device_id=device_id,
         device_name=device_name,
-        vendor_id=vendor_id,
-        product_id=product_id,
-        discriminator=discriminator,
-        passcode=passcode,
+        vendor_id=matter_config.vendor_id,
+        product_id=matter_config.product_id,
+        discriminator=matter_config.discriminator,
+        passcode=matter_config.passcode,
     )
     
-    # Register devices (lights and buttons)
-    binary_sensors = config.get('binary_sensors', {})
-    custom_commands = config.get('custom_commands', {})
-    
-    for device in devices(binary_sensors, custom_commands):
-        bridge.register(device)
+    # Register devices (lights and buttons). Sensors and custom commands
+    # have no Matter endpoint, so they are not created at all.
+    for button in buttons():
+        bridge.register(button)
+    for light in lights():
+        bridge.register(light)
     
     logger.info(f"Registered {len(bridge.lights)} lights and {len(bridge.buttons)} buttons")
     
@@ -90,6 +68,18 @@ async def main():
 
 def run():
     """Run the main async loop"""
+    # Setup logging; the format uses none of thread/process fields
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S',
+    )
+    if uvloop is not None:
+        # libuv-based loop: cheaper callbacks for UDP, mDNS and sysfs tasks
+        uvloop.install()
     try:
         aio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,67 @@
+"""
+Lumi gateway configuration loading
+"""
+
+import copy
+import functools
+import logging
+import os
+import typing as ty
+from dataclasses import dataclass, fields
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+logger = logging.getLogger(__name__)
+
+# Matter commissioning defaults (from Matter spec test values)
+MATTER_VENDOR_ID = 0xFFF1  # Test vendor ID
+MATTER_PRODUCT_ID = 0x8001  # Gateway product
+MATTER_DISCRIMINATOR = 3840  # Default discriminator
+MATTER_PASSCODE = 20202021  # Default setup PIN
+
+
+@dataclass(frozen=True)
+class MatterConfig:
+    """Matter commissioning parameters from the "matter" config section"""
+    vendor_id: int = MATTER_VENDOR_ID
+    product_id: int = MATTER_PRODUCT_ID
+    discriminator: int = MATTER_DISCRIMINATOR
+    passcode: int = MATTER_PASSCODE
+
+    @classmethod
+    def from_dict(cls, data: ty.Dict[str, ty.Any]) -> 'MatterConfig':
+        return cls(**{
+            f.name: data[f.name] for f in fields(cls) if f.name in data
+        })
+
+
+@functools.lru_cache(maxsize=4)
+def _read_config(config_path: str, mtime_ns: int) -> dict:
+    """Parse config file, memoized by path and modification time"""
+    with open(config_path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def load_config():
+    """Load configuration from JSON file"""
+    config_path = os.environ.get(
+        'LUMIMQTT_CONFIG',
+        '/etc/lumimqtt.json'
+    )
+
+    try:
+        mtime_ns = os.stat(config_path).st_mtime_ns
+        # Copy so callers can't mutate the cached result
+        return copy.deepcopy(_read_config(config_path, mtime_ns))
+    except FileNotFoundError:
+        logger.warning(f"Config file not found: {config_path}")
+        logger.info("Using default configuration")
+        return {
+            'device_id': 'lumi_gateway',
+            'device_name': 'Lumi Gateway',
+            'binary_sensors': {},
+            'custom_commands': {},
+        }
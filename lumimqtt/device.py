@@ -6,6 +6,7 @@ import typing as ty
 
 
 class Device:
+    __slots__ = ('name', 'device_file', 'topic')
     MQTT_VALUES: ty.Optional[ty.Dict] = None
 
     def __init__(self, name, device_file, topic=None):
@@ -11,10 +11,16 @@ from .device import Device
 logger = logging.getLogger(__name__)
 
 
+def color_repr(color: dict) -> str:
+    return '#{:02x}{:02x}{:02x}'.format(color['r'], color['g'], color['b'])
+
+
 class LED(Device):
     """
     LED control
     """
+    __slots__ = ('brightness', 'max_brightness')
+
     def __init__(self, name, device_dir):
         brightness_dev = os.path.join(device_dir, 'brightness')
         super().__init__(name, brightness_dev)
@@ -31,6 +37,7 @@ class Light(Device):
     """
     Light control
     """
+    __slots__ = ('red', 'green', 'blue', 'leds', 'state')
     COLOR_MODE = 'rgb'
     BRIGHTNESS = True
 
@@ -84,12 +91,11 @@ class Light(Device):
         if state.lower() == 'off':
             brightness = 0
 
-        def color_repr(color: dict):
-            return f'#{color["r"]:02x}{color["g"]:02x}{color["b"]:02x}'
-
-        logger.info(f'Change light from {self.state["state"]} '
-                    f'{start_brightness} {color_repr(start_color)} '
-                    f'to {state} {brightness} {color_repr(start_color)}')
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Change light from %s %s %s to %s %s %s',
+                        self.state['state'], start_brightness,
+                        color_repr(start_color), state, brightness,
+                        color_repr(start_color))
 
         if transition:
             steps = int(12 * transition)
@@ -108,7 +114,8 @@ class Light(Device):
                 await aio.sleep(delay)
 
         for c, led in self.leds.items():
-            next_value = color[c] / 255 * led.max_brightness * brightness / 255
+            next_value = (color[c] * brightness * led.max_brightness
+                          // 65025)  # 255 * 255, stay in integer domain
             next_value = int(min(max(next_value, 0),
                                  led.max_brightness))  # normalize
             await led.write(next_value)
@@ -4,19 +4,26 @@ Similar to Tasmota Matter implementation - minimal, efficient approach
 """
 
 import asyncio as aio
+import functools
+import io
 import json
 import logging
 import typing as ty
 from dataclasses import dataclass
-from datetime import datetime
 from zeroconf import ServiceInfo, Zeroconf
 from zeroconf.asyncio import AsyncZeroconf
-import qrcode
 import socket
 import struct
+import sys
 
 from .__version__ import version
-from .button import Button
+from .button import Button, ButtonAction
+from .config import (
+    MATTER_DISCRIMINATOR,
+    MATTER_PASSCODE,
+    MATTER_PRODUCT_ID,
+    MATTER_VENDOR_ID,
+)
 from .device import Device
 from .light import Light
 
@@ -24,18 +31,56 @@ logger = logging.getLogger(__name__)
 
 # Matter constants (from Matter spec)
 MATTER_PORT = 5540
-MATTER_VENDOR_ID = 0xFFF1  # Test vendor ID
-MATTER_PRODUCT_ID = 0x8001  # Gateway product
-MATTER_DISCRIMINATOR = 3840  # Default discriminator
+MATTER_MAX_MESSAGE_SIZE = 1280  # Messages fit the IPv6 minimum MTU
+MATTER_SOCKET_BUFFER_SIZE = 1 << 20  # UDP socket send/receive buffers
+
+# Matter QR code payload layout (bit positions and masks)
+_QR_VERSION = 0  # Matter version, 3 bits at position 81
+_QR_CUSTOM_FLOW = 0  # Standard commissioning, 2 bits at position 47
+_QR_DISCOVERY_CAPS = 0x04  # On Network (BLE=0x01, SoftAP=0x02), 8 bits at 39
+_QR_FIXED_BITS = (
+    (_QR_VERSION & 0x7) << 81
+    | (_QR_CUSTOM_FLOW & 0x3) << 47
+    | (_QR_DISCOVERY_CAPS & 0xFF) << 39
+)
+_MASK_VID, _SHIFT_VID = 0xFFFF, 65  # 16 bits at position 65
+_MASK_PID, _SHIFT_PID = 0xFFFF, 49  # 16 bits at position 49
+_MASK_DISC, _SHIFT_DISC = 0xFFF, 27  # 12 bits at position 27
+_MASK_PASS = 0x7FFFFFF  # 27 bits at position 0
+_BASE38_CHARS = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-."
+
+# Matter message header: flags, session ID, security flags, message counter
+_HDR = struct.Struct('<BHBI')
+
+# lumimqtt button actions to Matter Switch cluster events
+_BUTTON_SWITCH_EVENTS = {
+    ButtonAction.SINGLE: 0x02,  # ShortRelease
+    ButtonAction.DOUBLE: 0x05,  # MultiPressComplete (2 presses)
+    ButtonAction.TRIPLE: 0x05,  # MultiPressComplete (3 presses)
+    ButtonAction.HOLD: 0x01,  # LongPress
+    ButtonAction.RELEASE: 0x03,  # LongRelease
+}
 
 
 @dataclass
 class MatterEndpoint:
     """Matter endpoint representation"""
+    # Declared by hand: dataclass(slots=True) needs Python 3.10
+    __slots__ = ('endpoint_id', 'device_type', 'clusters', 'device')
+
     endpoint_id: int
     device_type: int
-    clusters: ty.List[int]
-    device: Device
+    clusters: ty.Tuple[int, ...]
+    device: ty.Optional[Device]
+
+
+class MatterMessage(ty.NamedTuple):
+    """Parsed Matter message header and payload"""
+    flags: int
+    session_id: int
+    security_flags: int
+    message_counter: int
+    payload: memoryview
 
 
 class MatterDeviceType:
@@ -63,6 +108,79 @@ class MatterCluster:
     SWITCH = 0x003B
 
 
+_ROOT_CLUSTERS = (
+    MatterCluster.DESCRIPTOR,
+    MatterCluster.IDENTIFY,
+)
+_LIGHT_CLUSTERS = (
+    MatterCluster.DESCRIPTOR,
+    MatterCluster.IDENTIFY,
+    MatterCluster.ON_OFF,
+    MatterCluster.LEVEL_CONTROL,
+    MatterCluster.COLOR_CONTROL,
+)
+_SWITCH_CLUSTERS = (
+    MatterCluster.DESCRIPTOR,
+    MatterCluster.IDENTIFY,
+    MatterCluster.SWITCH,
+)
+
+
+class _EndpointSpec(ty.NamedTuple):
+    """How a device class is exposed as a Matter endpoint"""
+    name: str
+    device_type: int
+    clusters: ty.Tuple[int, ...]
+    devices: str  # LumiMatter attribute with the list of such devices
+
+
+_ENDPOINT_SPECS: ty.Dict[type, _EndpointSpec] = {
+    # Extended Color Light (RGB)
+    Light: _EndpointSpec(
+        'RGB Light',
+        MatterDeviceType.EXTENDED_COLOR_LIGHT,
+        _LIGHT_CLUSTERS,
+        'lights',
+    ),
+    # Generic Switch (momentary button)
+    Button: _EndpointSpec(
+        'Button',
+        MatterDeviceType.GENERIC_SWITCH,
+        _SWITCH_CLUSTERS,
+        'buttons',
+    ),
+}
+
+
+async def _run_all(*coros: ty.Awaitable) -> None:
+    """
+    Run coroutines concurrently until all of them are done.
+    If one fails or the caller is cancelled, the others are cancelled.
+    The first failure is re-raised as is on every Python version.
+    """
+    if hasattr(aio, 'TaskGroup'):  # Python 3.11+
+        try:
+            async with aio.TaskGroup() as group:
+                for coro in coros:
+                    group.create_task(coro)
+        except BaseExceptionGroup as err:  # noqa: F821 (3.11+ builtin)
+            raise err.exceptions[0] from None
+        return
+
+    tasks = [aio.ensure_future(coro) for coro in coros]
+    if not tasks:
+        return
+    try:
+        await aio.wait(tasks, return_when=aio.FIRST_EXCEPTION)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await aio.gather(*tasks, return_exceptions=True)
+    for t in tasks:
+        if not t.cancelled():
+            t.result()
+
+
 class LumiMatter:
     """
     Lightweight Matter Bridge for Xiaomi Lumi Gateway
@@ -77,7 +195,7 @@ class LumiMatter:
         vendor_id: int = MATTER_VENDOR_ID,
         product_id: int = MATTER_PRODUCT_ID,
         discriminator: int = MATTER_DISCRIMINATOR,
-        passcode: int = 20202021,
+        passcode: int = MATTER_PASSCODE,
         port: int = MATTER_PORT,
     ) -> None:
         self.dev_id = device_id
@@ -92,6 +210,8 @@ class LumiMatter:
         self.lights: ty.List[Light] = []
         self.buttons: ty.List[Button] = []
         self.endpoints: ty.List[MatterEndpoint] = []
+        self._endpoint_by_id: ty.Dict[int, MatterEndpoint] = {}
+        self._endpoint_by_device: ty.Dict[Device, MatterEndpoint] = {}
         
         # Matter service
         self.zeroconf: ty.Optional[AsyncZeroconf] = None
@@ -100,12 +220,34 @@ class LumiMatter:
         # State
         self._commissioned = False
         self._fabric_id: ty.Optional[int] = None
-        self._tasks: ty.List[aio.Task] = []
-        
+        self._shutdown = aio.Event()
+        self._handlers: ty.Optional[aio.Future] = None
+        
+        # Light updates coalesced until the light handler wakes up
+        self._light_updates: ty.Dict[Light, ty.Dict[str, ty.Any]] = {}
+        self._light_wake = aio.Event()
+        # Updates being applied; light.state changes only once they finish
+        self._light_targets: ty.Dict[Light, ty.Dict[str, ty.Any]] = {}
+
         # UDP server for Matter protocol
         self._udp_transport: ty.Optional[aio.DatagramTransport] = None
         self._udp_protocol: ty.Optional['MatterUDPProtocol'] = None
         
+        # Pairing codes depend only on the constructor arguments
+        self._qr_payload = self._generate_qr_code()
+        self._manual_code = self._generate_manual_code()
+        self._qr_ascii: ty.Optional[str] = None
+
+        # mDNS TXT records, except the commissioning mode flag
+        self._txt_records = {
+            "D": str(self.discriminator),  # Discriminator
+            "VP": f"{self.vendor_id}+{self.product_id}",  # Vendor+Product
+            "DT": "65535",  # Device type (bridge)
+            "DN": self.device_name,  # Device name
+            "SII": "5000",  # Sleep Idle Interval
+            "SAI": "300",  # Sleep Active Interval
+        }
+
         # Setup root endpoint (endpoint 0)
         self._setup_root_endpoint()
     
@@ -114,54 +256,43 @@ class LumiMatter:
         root_endpoint = MatterEndpoint(
             endpoint_id=0,
             device_type=MatterDeviceType.ROOT_NODE,
-            clusters=[
-                MatterCluster.DESCRIPTOR,
-                MatterCluster.IDENTIFY,
-            ],
+            clusters=_ROOT_CLUSTERS,
             device=None
         )
-        self.endpoints.append(root_endpoint)
+        self._add_endpoint(root_endpoint)
+
+    def _add_endpoint(self, endpoint: MatterEndpoint):
+        """Add endpoint to the list and lookup indexes"""
+        self.endpoints.append(endpoint)
+        self._endpoint_by_id[endpoint.endpoint_id] = endpoint
+        if endpoint.device is not None:
+            self._endpoint_by_device[endpoint.device] = endpoint
     
     def register(self, device: Device):
         """Register a device and create Matter endpoint"""
         if not device:
             return
         
-        endpoint_id = len(self.endpoints)
+        spec = next(
+            (
+                _ENDPOINT_SPECS[cls] for cls in type(device).__mro__
+                if cls in _ENDPOINT_SPECS
+            ),
+            None,
+        )
+        if spec is None:
+            return
         
-        if isinstance(device, Light):
-            # Register as Extended Color Light (RGB)
-            endpoint = MatterEndpoint(
-                endpoint_id=endpoint_id,
-                device_type=MatterDeviceType.EXTENDED_COLOR_LIGHT,
-                clusters=[
-                    MatterCluster.DESCRIPTOR,
-                    MatterCluster.IDENTIFY,
-                    MatterCluster.ON_OFF,
-                    MatterCluster.LEVEL_CONTROL,
-                    MatterCluster.COLOR_CONTROL,
-                ],
-                device=device
-            )
-            self.lights.append(device)
-            self.endpoints.append(endpoint)
-            logger.info(f"Registered RGB Light on endpoint {endpoint_id}")
-            
-        elif isinstance(device, Button):
-            # Register as Generic Switch (momentary button)
-            endpoint = MatterEndpoint(
-                endpoint_id=endpoint_id,
-                device_type=MatterDeviceType.GENERIC_SWITCH,
-                clusters=[
-                    MatterCluster.DESCRIPTOR,
-                    MatterCluster.IDENTIFY,
-                    MatterCluster.SWITCH,
-                ],
-                device=device
-            )
-            self.buttons.append(device)
-            self.endpoints.append(endpoint)
-            logger.info(f"Registered Button on endpoint {endpoint_id}")
+        endpoint_id = len(self.endpoints)
+        endpoint = MatterEndpoint(
+            endpoint_id=endpoint_id,
+            device_type=spec.device_type,
+            clusters=spec.clusters,
+            device=device
+        )
+        getattr(self, spec.devices).append(device)
+        self._add_endpoint(endpoint)
+        logger.info("Registered %s on endpoint %d", spec.name, endpoint_id)
     
     async def start(self):
         """Start Matter bridge"""
@@ -173,24 +304,19 @@ class LumiMatter:
         # Start mDNS service discovery
         await self._start_mdns()
         
-        # Start device handlers
-        self._tasks = [
-            aio.create_task(self._handle_buttons()),
-            aio.create_task(self._handle_lights()),
-            aio.create_task(self._handle_commissioning()),
-        ]
-        
-        # Wait for tasks
-        finished, _ = await aio.wait(
-            self._tasks,
-            return_when=aio.FIRST_COMPLETED,
-        )
-        for t in finished:
-            t.result()
+        # Run device handlers until cancelled (by close() or the caller)
+        # or one of them fails
+        self._handlers = aio.ensure_future(_run_all(
+            self._handle_buttons(),
+            self._handle_lights(),
+            self._handle_commissioning(),
+        ))
+        await self._handlers
     
     async def close(self) -> None:
         """Stop Matter bridge"""
         logger.info("Stopping Matter Bridge")
+        self._shutdown.set()
         
         # Stop UDP server
         if self._udp_transport:
@@ -199,15 +325,11 @@ class LumiMatter:
         # Stop mDNS
         if self.zeroconf:
             await self._stop_mdns()
-        
-        # Cancel tasks
-        for task in self._tasks:
-            if not task.done():
-                task.cancel()
-                try:
-                    await task
-                except aio.CancelledError:
-                    pass
+
+        # Stop device handlers, this also ends a running start()
+        if self._handlers:
+            self._handlers.cancel()
+            await aio.gather(self._handlers, return_exceptions=True)
     
     async def _start_mdns(self):
         """Start mDNS advertisement for Matter device discovery"""
@@ -219,13 +341,8 @@ class LumiMatter:
         
         # Matter TXT records for commissioning
         txt_records = {
-            "D": str(self.discriminator),  # Discriminator
-            "VP": f"{self.vendor_id}+{self.product_id}",  # Vendor+Product
+            **self._txt_records,
             "CM": "1" if not self._commissioned else "0",  # Commissioning mode
-            "DT": "65535",  # Device type (bridge)
-            "DN": self.device_name,  # Device name
-            "SII": "5000",  # Sleep Idle Interval
-            "SAI": "300",  # Sleep Active Interval
         }
         
         # Create service info
@@ -258,65 +375,76 @@ class LumiMatter:
         # Custom Flow (2 bits) | Discovery Caps (8 bits) |
         # Discriminator (12 bits) | Passcode (27 bits)
         
-        version = 0  # Matter version
-        vid = self.vendor_id
-        pid = self.product_id
-        custom_flow = 0  # Standard commissioning
-        discovery_caps = 0x04  # On Network (BLE=0x01, SoftAP=0x02, OnNetwork=0x04)
-        discriminator = self.discriminator
-        passcode = self.passcode
-        
         # Pack into bits
         # Total: 3 + 16 + 16 + 2 + 8 + 12 + 27 = 84 bits
-        value = 0
-        value |= (version & 0x7) << 81  # 3 bits at position 81
-        value |= (vid & 0xFFFF) << 65   # 16 bits at position 65
-        value |= (pid & 0xFFFF) << 49   # 16 bits at position 49
-        value |= (custom_flow & 0x3) << 47  # 2 bits at position 47
-        value |= (discovery_caps & 0xFF) << 39  # 8 bits at position 39
-        value |= (discriminator & 0xFFF) << 27  # 12 bits at position 27
-        value |= (passcode & 0x7FFFFFF)  # 27 bits at position 0
+        value = (
+            _QR_FIXED_BITS
+            | (self.vendor_id & _MASK_VID) << _SHIFT_VID
+            | (self.product_id & _MASK_PID) << _SHIFT_PID
+            | (self.discriminator & _MASK_DISC) << _SHIFT_DISC
+            | (self.passcode & _MASK_PASS)
+        )
         
         # Convert to base-38 encoded string
-        base38_chars = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-."
-        encoded = ""
+        digits = bytearray()
         
-        # Encode the value in base-38
-        temp_value = value
-        while temp_value > 0:
-            encoded = base38_chars[temp_value % 38] + encoded
-            temp_value //= 38
+        # Encode the value in base-38 (least significant digit first)
+        while value:
+            value, digit = divmod(value, 38)
+            digits.append(_BASE38_CHARS[digit])
+        digits.reverse()
         
         # Pad to ensure minimum length (should be ~15-20 chars for Matter QR)
-        while len(encoded) < 20:
-            encoded = "0" + encoded
+        # (not zfill: '-' is a base-38 digit, not a sign)
+        encoded = digits.rjust(20, b'0').decode('ascii')
         
         # Matter QR code format
         qr_payload = f"MT:{encoded}"
         
         return qr_payload
     
+    def _generate_manual_code(self) -> str:
+        """Generate manual pairing code (11 digits)"""
+        # Matter format: XXXX-XXX-XXXX (as expected by Yandex Station)
+        code = f"{self.passcode:011d}"  # Pad to 11 digits
+        return f"{code[0:4]}-{code[4:7]}-{code[7:11]}"
+
+    def _render_qr_ascii(self) -> str:
+        """Render the QR code as ASCII art, once"""
+        if self._qr_ascii is None:
+            # qrcode is only needed here, import it lazily
+            import qrcode
+            qr = qrcode.QRCode(
+                version=1,
+                error_correction=qrcode.constants.ERROR_CORRECT_L,
+                box_size=1,
+                border=2,
+            )
+            qr.add_data(self._qr_payload)
+            qr.make(fit=True)
+            out = io.StringIO()
+            qr.print_ascii(out=out, invert=True)
+            self._qr_ascii = out.getvalue()
+        return self._qr_ascii
+
     def _display_pairing_info(self):
         """Display pairing QR code and manual code"""
-        qr_payload = self._generate_qr_code()
-        
-        # Generate manual pairing code (11 digits)
-        # Matter format: XXXX-XXX-XXXX (as expected by Yandex Station)
-        manual_code_value = self.passcode
-        manual_code_str = f"{manual_code_value:011d}"  # Pad to 11 digits
-        manual_code = f"{manual_code_str[0:4]}-{manual_code_str[4:7]}-{manual_code_str[7:11]}"
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=1,
-            border=2,
-        )
-        qr.add_data(qr_payload)
-        qr.make(fit=True)
+        # The banner and QR art are only useful on a console; services
+        # usually run with stdout redirected to a log or /dev/null
+        if sys.stdout.isatty():
+            self._print_pairing_info()
+        else:
+            logger.info("stdout is not a TTY, skipping pairing QR code render")
+
+        logger.info("Manual pairing code (XXXX-XXX-XXXX format): %s",
+                    self._manual_code)
+        logger.info("QR payload: %s", self._qr_payload)
+
+    def _print_pairing_info(self):
+        """Print pairing banner with the ASCII QR code to console"""
+        qr_payload = self._qr_payload
+        manual_code = self._manual_code
         
-        # Print to console
         print("\n" + "="*60)
         print("🔗 MATTER DEVICE PAIRING INFORMATION")
         print("="*60)
@@ -335,7 +463,7 @@ class LumiMatter:
         print()
         
         # Print QR code to console
-        qr.print_ascii(invert=True)
+        sys.stdout.write(self._render_qr_ascii())
         
         print()
         print("="*60)
@@ -347,63 +475,30 @@ class LumiMatter:
         print("5. Follow on-screen instructions")
         print("="*60)
         print()
-        
-        logger.info(f"Manual pairing code (XXXX-XXX-XXXX format): {manual_code}")
-        logger.info(f"QR payload: {qr_payload}")
     
     async def _handle_commissioning(self):
         """Handle Matter commissioning process"""
-        while True:
-            # In a real implementation, this would handle:
-            # 1. PASE (Password Authenticated Session Establishment)
-            # 2. Certificate exchange
-            # 3. Fabric joining
-            # 
-            # For now, we'll simulate commissioning state
-            await aio.sleep(5)
-            
-            # TODO: Implement actual Matter commissioning protocol
-            # This requires handling UDP packets on port 5540
+        # In a real implementation, this would handle:
+        # 1. PASE (Password Authenticated Session Establishment)
+        # 2. Certificate exchange
+        # 3. Fabric joining
+        #
+        # For now, just idle until the bridge is closed
+        await self._shutdown.wait()
+
+        # TODO: Implement actual Matter commissioning protocol
+        # This requires handling UDP packets on port 5540
     
     async def _handle_buttons(self):
         """Handle button events and map to Matter Switch cluster"""
-        tasks = [
-            aio.create_task(button.handle(self._on_button_event))
+        await _run_all(*(
+            button.handle(self._on_button_event)
             for button in self.buttons
-        ]
-        
-        if not tasks:
-            # No buttons, sleep forever
-            await aio.Event().wait()
-            return
-        
-        try:
-            finished, unfinished = await aio.wait(
-                tasks,
-                return_when=aio.FIRST_COMPLETED,
-            )
-        except aio.CancelledError:
-            for t in tasks:
-                t.cancel()
-                try:
-                    await t
-                except aio.CancelledError:
-                    pass
-            raise
-        
-        for t in unfinished:
-            t.cancel()
-            try:
-                await t
-            except aio.CancelledError:
-                pass
-        
-        for t in finished:
-            t.result()
+        ))
     
     async def _on_button_event(self, button: Button, action: str):
         """Handle button action and send Matter event"""
-        logger.info(f"Button {button.name} action: {action}")
+        logger.info("Button %s action: %s", button.name, action)
         
         # Map button actions to Matter Switch events
         # Matter Switch cluster supports:
@@ -414,39 +509,42 @@ class LumiMatter:
         # - MultiPressOngoing (0x04)
         # - MultiPressComplete (0x05)
         
-        matter_event = self._map_button_action_to_matter(action)
+        matter_event = _BUTTON_SWITCH_EVENTS.get(action, 0x00)
         
         # Find endpoint for this button
-        endpoint = next(
-            (ep for ep in self.endpoints if ep.device == button),
-            None
-        )
+        endpoint = self._endpoint_by_device.get(button)
         
         if endpoint:
             # TODO: Send Matter event notification
             # In real implementation, this would send to all subscribed controllers
             logger.debug(
-                f"Matter event on endpoint {endpoint.endpoint_id}: "
-                f"Switch cluster event {matter_event}"
+                "Matter event on endpoint %d: Switch cluster event %d",
+                endpoint.endpoint_id, matter_event,
             )
     
-    def _map_button_action_to_matter(self, action: str) -> int:
-        """Map lumimqtt button action to Matter Switch event"""
-        mapping = {
-            'single': 0x02,  # ShortRelease
-            'double': 0x05,  # MultiPressComplete (2 presses)
-            'triple': 0x05,  # MultiPressComplete (3 presses)
-            'hold': 0x01,    # LongPress
-            'release': 0x03, # LongRelease
-        }
-        return mapping.get(action, 0x00)
-    
     async def _handle_lights(self):
-        """Monitor light state changes"""
+        """Apply light updates queued by Matter commands"""
         while True:
-            await aio.sleep(1)
-            # Lights are controlled via Matter commands
-            # This task monitors for state changes and updates endpoints
+            await self._light_wake.wait()
+            self._light_wake.clear()
+            updates, self._light_updates = self._light_updates, {}
+            for light, update in updates.items():
+                self._light_targets[light] = update
+                try:
+                    await light.set(update, 0)
+                except Exception:
+                    # Keep serving other lights and later commands
+                    logger.exception("Can not update light %s", light.name)
+                finally:
+                    del self._light_targets[light]
+
+    def _requested_state(self, light: Light) -> ty.Dict[str, ty.Any]:
+        """Light state once all in-flight and queued updates are applied"""
+        return {
+            **light.state,
+            **self._light_targets.get(light, {}),
+            **self._light_updates.get(light, {}),
+        }
     
     async def handle_light_command(
         self,
@@ -456,51 +554,66 @@ class LumiMatter:
         args: dict
     ):
         """Handle Matter light control commands"""
-        endpoint = next(
-            (ep for ep in self.endpoints if ep.endpoint_id == endpoint_id),
-            None
-        )
+        endpoint = self._endpoint_by_id.get(endpoint_id)
         
         if not endpoint or not isinstance(endpoint.device, Light):
-            logger.error(f"Invalid light endpoint: {endpoint_id}")
+            logger.error("Invalid light endpoint: %s", endpoint_id)
             return
         
+        handler = _LIGHT_COMMANDS.get((cluster_id, command_id))
+        if handler is None:
+            return
+
         light: Light = endpoint.device
-        
-        # Handle OnOff cluster (0x0006)
-        if cluster_id == MatterCluster.ON_OFF:
-            if command_id == 0x00:  # Off
-                await light.set({'state': 'OFF'}, 0)
-            elif command_id == 0x01:  # On
-                await light.set({'state': 'ON'}, 0)
-            elif command_id == 0x02:  # Toggle
-                new_state = 'OFF' if light.state['state'] == 'ON' else 'ON'
-                await light.set({'state': new_state}, 0)
-        
-        # Handle LevelControl cluster (0x0008) - Brightness
-        elif cluster_id == MatterCluster.LEVEL_CONTROL:
-            if command_id == 0x00:  # MoveToLevel
-                level = args.get('level', 255)
-                transition = args.get('transition_time', 0) / 10  # Convert to seconds
-                await light.set({'brightness': level}, transition)
-        
-        # Handle ColorControl cluster (0x0300) - RGB Color
-        elif cluster_id == MatterCluster.COLOR_CONTROL:
-            if command_id == 0x47:  # MoveToHueAndSaturation
-                # Convert HSV to RGB
-                hue = args.get('hue', 0)
-                saturation = args.get('saturation', 0)
-                rgb = self._hsv_to_rgb(hue / 254 * 360, saturation / 254 * 100, 100)
-                await light.set({
-                    'color': {'r': rgb[0], 'g': rgb[1], 'b': rgb[2]}
-                }, 0)
+        current = self._requested_state(light)
+        self._queue_light_update(light, handler(light, current, args))
+
+    def _queue_light_update(self, light: Light, update: dict):
+        """
+        Merge update into the light's pending state.
+        Controllers send level and color commands back-to-back, so they
+        are applied together with a single light.set() by _handle_lights.
+        """
+        current = self._requested_state(light)
+        changes = {
+            key: value for key, value in update.items()
+            if key == 'transition' or current.get(key) != value
+        }
+        if changes.keys() <= {'transition'}:
+            # Controllers re-send the current state, nothing to write
+            return
+        self._light_updates.setdefault(light, {}).update(changes)
+        self._light_wake.set()
     
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _hue_sat_to_rgb(hue: int, saturation: int) -> ty.Tuple[int, int, int]:
+        """Matter hue/saturation (0-254) to RGB, memoized per value pair"""
+        return LumiMatter._hsv_to_rgb(
+            hue / 254 * 360,
+            saturation / 254 * 100,
+            100,
+        )
+
     @staticmethod
     def _hsv_to_rgb(h: float, s: float, v: float) -> ty.Tuple[int, int, int]:
-        """Convert HSV to RGB (0-255)"""
-        import colorsys
-        r, g, b = colorsys.hsv_to_rgb(h / 360, s / 100, v / 100)
-        return int(r * 255), int(g * 255), int(b * 255)
+        """Convert HSV to RGB (0-255) using integer arithmetic"""
+        # Hue as one of 6 color wheel sectors with 1/256 steps inside it
+        sector, fraction = divmod(int(h * 1536 / 360) % 1536, 256)
+        s = int(s * 255 / 100)
+        v = int(v * 255 / 100)
+        chroma = v * s // 255
+        x = chroma * (256 - fraction if sector & 1 else fraction) // 256
+        m = v - chroma
+        r, g, b = (
+            (chroma, x, 0),
+            (x, chroma, 0),
+            (0, chroma, x),
+            (0, x, chroma),
+            (x, 0, chroma),
+            (chroma, 0, x),
+        )[sector]
+        return r + m, g + m, b + m
     
     async def _start_udp_server(self):
         """Start UDP server for Matter protocol on port 5540"""
@@ -514,15 +627,76 @@ class LumiMatter:
         )
         self._udp_transport = transport
         
+        # Larger kernel buffers absorb commissioning bursts
+        # (capped by net.core.rmem_max / wmem_max)
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, option,
+                                    MATTER_SOCKET_BUFFER_SIZE)
+                except OSError as err:
+                    logger.warning("Can not set Matter socket buffer: %s", err)
+
         logger.info(f"Matter UDP server started on port {self.port}")
 
 
+# Matter light command handlers: (light, requested state, args) -> update
+
+def _light_off(light: Light, current: dict, args: dict) -> dict:
+    return {'state': 'OFF'}
+
+
+def _light_on(light: Light, current: dict, args: dict) -> dict:
+    return {'state': 'ON'}
+
+
+def _light_toggle(light: Light, current: dict, args: dict) -> dict:
+    state = current['state']
+    return {'state': 'OFF' if state == 'ON' else 'ON'}
+
+
+def _light_move_to_level(light: Light, current: dict, args: dict) -> dict:
+    return {
+        'brightness': min(max(int(args.get('level', 255)), 0), 255),
+        'transition': args.get('transition_time', 0) / 10,  # Convert to seconds
+    }
+
+
+def _light_move_to_hue_and_saturation(
+    light: Light,
+    current: dict,
+    args: dict,
+) -> dict:
+    r, g, b = LumiMatter._hue_sat_to_rgb(
+        args.get('hue', 0),
+        args.get('saturation', 0),
+    )
+    return {'color': {'r': r, 'g': g, 'b': b}}
+
+
+_LIGHT_COMMANDS: ty.Dict[
+    ty.Tuple[int, int],
+    ty.Callable[[Light, dict, dict], dict],
+] = {
+    (MatterCluster.ON_OFF, 0x00): _light_off,
+    (MatterCluster.ON_OFF, 0x01): _light_on,
+    (MatterCluster.ON_OFF, 0x02): _light_toggle,
+    (MatterCluster.LEVEL_CONTROL, 0x00): _light_move_to_level,
+    (MatterCluster.COLOR_CONTROL, 0x47): _light_move_to_hue_and_saturation,
+}
+
+
 class MatterUDPProtocol(aio.DatagramProtocol):
     """UDP protocol handler for Matter messages"""
     
     def __init__(self, bridge: LumiMatter):
         self.bridge = bridge
         self.transport: ty.Optional[aio.DatagramTransport] = None
+
+        # Responses are assembled in place, then copied out once
+        self._tx = bytearray(MATTER_MAX_MESSAGE_SIZE)
+        self._tx_view = memoryview(self._tx)
     
     def connection_made(self, transport):
         self.transport = transport
@@ -530,12 +704,16 @@ class MatterUDPProtocol(aio.DatagramProtocol):
     
     def datagram_received(self, data: bytes, addr: ty.Tuple[str, int]):
         """Handle incoming Matter UDP packets"""
-        logger.info(f"Received Matter packet from {addr[0]}:{addr[1]}, size: {len(data)} bytes")
+        logger.info("Received Matter packet from %s:%d, size: %d bytes",
+                    addr[0], addr[1], len(data))
         
         # Parse Matter message
         try:
             message = self._parse_matter_message(data)
-            logger.debug(f"Matter message: {message}")
+            if logger.isEnabledFor(logging.DEBUG):
+                # memoryview has no useful repr, show the payload bytes
+                logger.debug("Matter message: %s", message._replace(
+                    payload=bytes(message.payload)))
             
             # Handle message based on type
             response = self._handle_matter_message(message, addr)
@@ -543,14 +721,16 @@ class MatterUDPProtocol(aio.DatagramProtocol):
             if response:
                 # Send response
                 self.transport.sendto(response, addr)
-                logger.debug(f"Sent Matter response to {addr[0]}:{addr[1]}, size: {len(response)} bytes")
+                logger.debug("Sent Matter response to %s:%d, size: %d bytes",
+                             addr[0], addr[1], len(response))
         
         except Exception as e:
-            logger.error(f"Error processing Matter message: {e}", exc_info=True)
+            logger.error("Error processing Matter message: %s", e,
+                         exc_info=True)
     
-    def _parse_matter_message(self, data: bytes) -> dict:
+    def _parse_matter_message(self, data: bytes) -> MatterMessage:
         """Parse Matter protocol message (simplified)"""
-        if len(data) < 8:
+        if len(data) < _HDR.size:
             raise ValueError("Message too short")
         
         # Matter message structure (simplified):
@@ -560,36 +740,29 @@ class MatterUDPProtocol(aio.DatagramProtocol):
         # Byte 4-7: Message counter
         # Byte 8+: Payload
         
-        flags = data[0]
-        session_id = struct.unpack('<H', data[1:3])[0]
-        security_flags = data[3]
-        message_counter = struct.unpack('<I', data[4:8])[0]
-        payload = data[8:]
-        
-        return {
-            'flags': flags,
-            'session_id': session_id,
-            'security_flags': security_flags,
-            'message_counter': message_counter,
-            'payload': payload,
-        }
+        # Payload is a view into the datagram, not a copy
+        return MatterMessage(
+            *_HDR.unpack_from(data),
+            memoryview(data)[_HDR.size:],
+        )
     
-    def _handle_matter_message(self, message: dict, addr: ty.Tuple[str, int]) -> ty.Optional[bytes]:
+    def _handle_matter_message(self, message: MatterMessage, addr: ty.Tuple[str, int]) -> ty.Optional[bytes]:
         """Handle Matter message and generate response"""
         
         # Check if this is a commissioning message (session_id = 0)
-        if message['session_id'] == 0:
+        if message.session_id == 0:
             logger.info("Received commissioning message")
             return self._handle_commissioning_message(message, addr)
         
         # Handle other messages
-        logger.debug(f"Received operational message on session {message['session_id']}")
+        logger.debug("Received operational message on session %d",
+                     message.session_id)
         return None
     
-    def _handle_commissioning_message(self, message: dict, addr: ty.Tuple[str, int]) -> bytes:
+    def _handle_commissioning_message(self, message: MatterMessage, addr: ty.Tuple[str, int]) -> bytes:
         """Handle PASE commissioning message (simplified)"""
         
-        payload = message['payload']
+        payload = message.payload
         
         # Try to parse Protocol Opcode from payload
         if len(payload) < 4:
@@ -599,7 +772,8 @@ class MatterUDPProtocol(aio.DatagramProtocol):
         # Extract protocol opcode (byte 0-1 of secure channel protocol)
         # This is very simplified - real implementation would parse TLV structure
         
-        logger.info(f"Processing PASE commissioning (payload size: {len(payload)} bytes)")
+        logger.info("Processing PASE commissioning (payload size: %d bytes)",
+                    len(payload))
         
         # For now, send a simple acknowledgment
         # Real implementation would:
@@ -611,14 +785,14 @@ class MatterUDPProtocol(aio.DatagramProtocol):
         # Send basic acknowledgment
         return self._build_pase_response(message)
     
-    def _build_pase_response(self, request: dict) -> bytes:
+    def _build_pase_response(self, request: MatterMessage) -> bytes:
         """Build PASE response message (very simplified)"""
         
         # Build Matter message header
         flags = 0x00  # Unsecured message
         session_id = 0  # Commissioning session
         security_flags = 0x00
-        message_counter = request['message_counter'] + 1
+        message_counter = request.message_counter + 1
         
         # Very basic payload - real implementation would include:
         # - PBKDF parameters (iterations, salt)
@@ -629,32 +803,31 @@ class MatterUDPProtocol(aio.DatagramProtocol):
         payload = b'\x15\x30\x01\x00'  # Minimal TLV structure
         
         # Pack message
-        response = struct.pack('<BHB', flags, session_id, security_flags)
-        response += struct.pack('<I', message_counter)
-        response += payload
+        _HDR.pack_into(self._tx, 0, flags, session_id, security_flags,
+                       message_counter)
+        end = _HDR.size + len(payload)
+        self._tx[_HDR.size:end] = payload
         
         logger.info("Sent PASE response (simplified)")
-        return response
+        return self._tx_view[:end].tobytes()
     
-    def _build_status_response(self, request: dict, status: int) -> bytes:
+    def _build_status_response(self, request: MatterMessage, status: int) -> bytes:
         """Build status response message"""
         
         flags = 0x00
-        session_id = request['session_id']
+        session_id = request.session_id
         security_flags = 0x00
-        message_counter = request['message_counter'] + 1
+        message_counter = request.message_counter + 1
         
         # Status report payload
-        payload = struct.pack('<B', status)
-        
-        response = struct.pack('<BHB', flags, session_id, security_flags)
-        response += struct.pack('<I', message_counter)
-        response += payload
+        _HDR.pack_into(self._tx, 0, flags, session_id, security_flags,
+                       message_counter)
+        self._tx[_HDR.size] = status
         
-        return response
+        return self._tx_view[:_HDR.size + 1].tobytes()
     
     def error_received(self, exc):
-        logger.error(f"UDP error: {exc}")
+        logger.error("UDP error: %s", exc)
     
     def connection_lost(self, exc):
         logger.info("Matter UDP protocol closed")
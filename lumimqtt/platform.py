@@ -93,8 +93,3 @@ def commands(params) -> ty.List[Device]:
         }
         commands_.append(Command(**cmd_config))
     return commands_
-
-
-def devices(binary_sensors: dict, custom_commands: dict):
-    return sensors(binary_sensors) + buttons() + lights() + \
-        commands(custom_commands)
@@ -24,6 +24,10 @@ setup(
         'colorama>=0.4.6',
         'cryptography>=41.0.0',
     ],
+    extras_require={
+        'uvloop': ['uvloop>=0.17.0'],
+        'orjson': ['orjson>=3.9.0'],
+    },
     packages=['lumimqtt'],
     entry_points={
         'console_scripts': ['lumimqtt=lumimqtt.__main__:main'],
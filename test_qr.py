@@ -11,6 +11,41 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from lumimqtt.matter_bridge import LumiMatter
 
+def _reference_qr_payload(vid, pid, discriminator, passcode):
+    """Straightforward encoder the optimised one must agree with"""
+    value = 0
+    value |= (vid & 0xFFFF) << 65
+    value |= (pid & 0xFFFF) << 49
+    value |= (0x04 & 0xFF) << 39  # On Network discovery
+    value |= (discriminator & 0xFFF) << 27
+    value |= (passcode & 0x7FFFFFF)
+
+    base38_chars = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-."
+    encoded = ""
+    while value > 0:
+        encoded = base38_chars[value % 38] + encoded
+        value //= 38
+    while len(encoded) < 20:
+        encoded = "0" + encoded
+    return f"MT:{encoded}"
+
+
+def test_qr_payload_matches_reference():
+    """QR payloads match the reference encoder, including a leading '-'"""
+    for vid in (0x0000, 0x0001, 0x0150, 0x1234, 0xFFF1, 0xFFFF):
+        bridge = LumiMatter(
+            device_id="test_gateway",
+            device_name="Test Lumi Gateway",
+            vendor_id=vid,
+            product_id=0x8001,
+            discriminator=3840,
+            passcode=20202021,
+        )
+        expected = _reference_qr_payload(vid, 0x8001, 3840, 20202021)
+        payload = bridge._generate_qr_code()
+        assert payload == expected, (hex(vid), payload)
+
+
 def test_qr_generation():
     """Test QR code generation without starting full bridge"""
     print("Testing Matter Bridge QR Code Generation\n")
@@ -25,12 +60,13 @@ def test_qr_generation():
         passcode=20202021,
     )
     
-    # Display pairing info
-    bridge._display_pairing_info()
+    # Print pairing info (even when stdout is not a TTY)
+    bridge._print_pairing_info()
     
     print("\n✅ QR Code generation test successful!")
     print("\nNote: This is just a test. To run the full Matter Bridge:")
     print("  LUMIMQTT_CONFIG=./lumimqtt.json python3 -m lumimqtt")
 
 if __name__ == '__main__':
+    test_qr_payload_matches_reference()
     test_qr_generation()